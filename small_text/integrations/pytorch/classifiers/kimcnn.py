@@ -12,6 +12,7 @@ from small_text.classifiers.classification import EmbeddingMixin
 from small_text.integrations.pytorch.classifiers.base import PytorchClassifier
 from small_text.integrations.pytorch.exceptions import PytorchNotFoundError
 from small_text.integrations.pytorch.models.kimcnn import KimCNN
+from small_text.training.early_stopping import MeasuredValues
 from small_text.utils.classification import empty_result, get_splits
 from small_text.utils.context import build_pbar_context
 from small_text.utils.data import check_training_data, list_length
@@ -388,12 +389,8 @@ class KimCNNClassifier(KimCNNEmbeddingMixin, PytorchClassifier):
                                  f'\tLoss: {valid_loss:.4f}(valid)\t|\tAcc: {valid_acc * 100:.1f}% (valid)',
                                  verbosity=VERBOSITY_MORE_VERBOSE)
 
-                measured_values = {
-                    'train_acc': train_acc,
-                    'train_loss': train_loss,
-                    'val_acc': valid_acc,
-                    'val_loss': valid_loss
-                }
+                measured_values = MeasuredValues(train_acc=train_acc, train_loss=train_loss,
+                                                 val_acc=valid_acc, val_loss=valid_loss)
                 stop = early_stopping.check_early_stop(epoch+1, measured_values)
                 if not stop:
                     self.model_selection.add_model(self.model, epoch+1, valid_acc=valid_acc,
@@ -12,6 +12,7 @@ from sklearn.preprocessing import MultiLabelBinarizer
 
 from small_text.classifiers.classification import EmbeddingMixin
 from small_text.integrations.pytorch.exceptions import PytorchNotFoundError
+from small_text.training.early_stopping import MeasuredValues
 from small_text.utils.classification import empty_result, get_splits
 from small_text.utils.context import build_pbar_context
 from small_text.utils.data import check_training_data, list_length
@@ -536,10 +537,7 @@ class TransformerBasedClassification(TransformerBasedEmbeddingMixin, PytorchClas
                     valid_losses.append(valid_loss)
                     valid_accs.append(valid_acc)
 
-                    measured_values = dict({
-                        'val_loss': valid_loss,
-                        'val_acc': valid_acc
-                    })
+                    measured_values = MeasuredValues(val_loss=valid_loss, val_acc=valid_acc)
                     stop = stop or early_stopping.check_early_stop(num_epoch+1, measured_values)
 
         if validate_every:
@@ -552,12 +550,8 @@ class TransformerBasedClassification(TransformerBasedEmbeddingMixin, PytorchClas
         train_loss = train_loss / len(sub_train_)
         train_acc = train_acc / len(sub_train_)
 
-        measured_values = dict({
-            'train_loss': train_loss,
-            'train_acc': train_acc,
-            'val_loss': valid_loss,
-            'val_acc': valid_acc
-        })
+        measured_values = MeasuredValues(train_acc=train_acc, train_loss=train_loss,
+                                         val_acc=valid_acc, val_loss=valid_loss)
         stop = early_stopping.check_early_stop(num_epoch+1, measured_values)
         return train_loss, train_acc, valid_loss, valid_acc, stop
 
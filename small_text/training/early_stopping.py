@@ -1,7 +1,210 @@
 import logging
 import numpy as np
 
-from abc import ABC
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Mapping
+from operator import attrgetter
+
+logger = logging.getLogger(__name__)
+
+_VALID_MONITORS = frozenset({'train_acc', 'train_loss', 'val_acc', 'val_loss'})
+_ACC_MONITORS = frozenset({'train_acc', 'val_acc'})
+
+
+class _EarlyStoppingCore(ABC):
+    """Holds the parameters and the decision state of `EarlyStopping` and makes the
+    early stopping decision for a single measured value.
+
+    This is kept separate from `EarlyStopping` so that the per-call work consists only of
+    scalar comparisons on slot attributes. Subclasses fix the comparison direction.
+    """
+    __slots__ = ('patience', 'min_delta', 'threshold', 'best_value', 'wait', 'improved')
+
+    def __init__(self, patience, min_delta, threshold, best_value):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.threshold = threshold
+
+        self.best_value = best_value
+        self.wait = 0
+        self.improved = False
+
+    @abstractmethod
+    def check(self, value):
+        """Updates the state with the given value.
+
+        Parameters
+        ----------
+        value : float
+            The current value of the monitored metric.
+
+        Returns
+        -------
+        stop : bool
+            `True` if the training should be stopped, `False` otherwise. Afterwards, `improved`
+            indicates if `value` has become the new best value.
+        """
+        pass
+
+
+class _GreaterIsBetterCore(_EarlyStoppingCore):
+    """Decision for metrics where higher values are better (e.g., accuracy)."""
+    __slots__ = ()
+
+    def __init__(self, patience, min_delta, threshold):
+        super().__init__(patience, min_delta, threshold, -np.inf)
+
+    def check(self, value):
+        threshold = self.threshold
+        if threshold > 0 and value > threshold:
+            self.improved = False
+            return True
+
+        min_delta = self.min_delta
+        if min_delta > 0:
+            improved = value - self.best_value >= min_delta
+        else:
+            improved = value > self.best_value
+
+        self.improved = improved
+        if improved:
+            self.best_value = value
+            self.wait = 0
+            return False
+
+        self.wait += 1
+        return self.wait > self.patience
+
+
+class _LowerIsBetterCore(_EarlyStoppingCore):
+    """Decision for metrics where lower values are better (e.g., loss)."""
+    __slots__ = ()
+
+    def __init__(self, patience, min_delta, threshold):
+        super().__init__(patience, min_delta, threshold, np.inf)
+
+    def check(self, value):
+        threshold = self.threshold
+        if threshold > 0 and value < threshold:
+            self.improved = False
+            return True
+
+        min_delta = self.min_delta
+        if min_delta > 0:
+            improved = self.best_value - value >= min_delta
+        else:
+            improved = value < self.best_value
+
+        self.improved = improved
+        if improved:
+            self.best_value = value
+            self.wait = 0
+            return False
+
+        self.wait += 1
+        return self.wait > self.patience
+
+
+def _validate_monitor(monitor):
+    if not isinstance(monitor, str) or monitor not in _VALID_MONITORS:
+        raise ValueError(f'Unsupported metric "{monitor}". '
+                         'Valid values: [train_acc, train_loss, val_acc, val_loss]')
+
+
+def _validate_arguments(monitor, min_delta, patience, threshold):
+    _validate_monitor(monitor)
+
+    if min_delta < 0:
+        raise ValueError('Invalid value encountered: '
+                         '"min_delta" needs to be greater than zero.')
+
+    if patience <= 0:
+        raise ValueError('Invalid value encountered: '
+                         '"patience" needs to be greater or equal 1.')
+
+    if monitor in _ACC_MONITORS and (threshold < 0.0 or threshold > 1.0):
+        raise ValueError('Invalid value encountered: '
+                         '"threshold" needs to be within the interval [0, 1] '
+                         'for accuracy metrics.')
+
+
+class MeasuredValues(Mapping):
+    """A fixed record of the values which are measured during training and passed to
+    `EarlyStoppingHandler.check_early_stop()`. Values which have not been measured are `None`.
+
+    For compatibility with handlers which expect a dict, this record is a read-only mapping
+    which contains only the measured values, i.e. a metric whose value is `None` is treated
+    as a missing key. For example, `measured_values.get('val_loss', default)`,
+    `'val_loss' in measured_values`, and `dict(measured_values)` behave as for a dict
+    which contains only the measured metrics.
+
+    .. versionadded:: 1.1.0
+    """
+    __slots__ = ('train_acc', 'train_loss', 'val_acc', 'val_loss')
+
+    def __init__(self, train_acc=None, train_loss=None, val_acc=None, val_loss=None):
+        """
+        Parameters
+        ----------
+        train_acc : float or None, default=None
+            Training accuracy.
+        train_loss : float or None, default=None
+            Training loss.
+        val_acc : float or None, default=None
+            Validation accuracy.
+        val_loss : float or None, default=None
+            Validation loss.
+        """
+        self.train_acc = train_acc
+        self.train_loss = train_loss
+        self.val_acc = val_acc
+        self.val_loss = val_loss
+
+    @classmethod
+    def from_dict(cls, measured_values):
+        """Creates a record from a dictionary. Unknown keys are ignored.
+
+        Parameters
+        ----------
+        measured_values : dict of str to float
+            A dictionary (or any other object providing `get()`) of measured values.
+
+        Returns
+        -------
+        measured_values : MeasuredValues
+            A record containing the values of the given dictionary.
+        """
+        get_value = measured_values.get
+        return cls(get_value('train_acc'), get_value('train_loss'),
+                   get_value('val_acc'), get_value('val_loss'))
+
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        return default
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (key for key in self.__slots__ if getattr(self, key) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def __repr__(self):
+        return f'MeasuredValues(train_acc={self.train_acc}, train_loss={self.train_loss}, ' \
+               f'val_acc={self.val_acc}, val_loss={self.val_loss})'
 
 
 class EarlyStoppingHandler(ABC):
@@ -14,8 +217,8 @@ class EarlyStoppingHandler(ABC):
         ----------
         epoch : int
             The number of the current epoch. Multiple checks per epoch are allowed.
-        measure_values : dict of str to float
-            A dictionary of measured values.
+        measured_values : MeasuredValues or dict of str to float
+            The measured values.
         """
         pass
 
@@ -35,8 +238,8 @@ class NoopEarlyStopping(EarlyStoppingHandler):
         ----------
         epoch : int
             The number of the current epoch (1-indexed). Multiple checks per epoch are allowed.
-        measured_values : dict of str to float
-            A dictionary of measured values.
+        measured_values : MeasuredValues or dict of str to float
+            The measured values.
         """
         _unused = epoch, measured_values  # noqa:F841
         return False
@@ -73,30 +276,73 @@ class EarlyStopping(EarlyStoppingHandler):
         }
 
         self.monitor = monitor
-        self.min_delta = min_delta
-        self.patience = patience
-        self.threshold = threshold
 
         self.index_best = -1
-        self.history = np.empty((0,), dtype=self.dtype)
-
-    def _validate_arguments(self, monitor, min_delta, patience, threshold):
-        if monitor not in ['train_acc', 'train_loss', 'val_acc', 'val_loss']:
-            raise ValueError(f'Unsupported metric "{monitor}". '
-                             'Valid values: [train_acc, train_loss, val_acc, val_loss]')
+        self._monitor_getter = attrgetter(monitor)
+        self._greater_is_better = monitor in _ACC_MONITORS
 
-        if min_delta < 0:
-            raise ValueError('Invalid value encountered: '
-                             '"min_delta" needs to be greater than zero.')
-
-        if patience <= 0:
-            raise ValueError('Invalid value encountered: '
-                             '"patience" needs to be greater or equal 1.')
+        if self._greater_is_better:
+            self._core = _GreaterIsBetterCore(patience, min_delta, threshold)
+        else:
+            self._core = _LowerIsBetterCore(patience, min_delta, threshold)
+
+        # the history buffers are allocated on the first recorded row
+        self._capacity = 0
+        self._size = 0
+        self._epoch_counts = defaultdict(int)
+
+        self._dtype_obj = np.dtype(self.dtype)
+        for name in self._dtype_obj.names:
+            setattr(self, '_' + name, np.empty((0,), dtype=self._dtype_obj.fields[name][0]))
+
+    @property
+    def history(self):
+        """A (structured) array of all measured values which have been recorded so far.
+
+        Calls to `check_early_stop()` in which the monitored metric has not been measured
+        are not recorded. The values are stored column-wise internally, therefore the
+        structured array is assembled on access.
+
+        Returns
+        -------
+        history : np.ndarray
+            A structured array containing one row per call to `check_early_stop()`
+            in which the monitored metric has been measured.
+        """
+        history = np.empty((self._size,), dtype=self._dtype_obj)
+        for name in self._dtype_obj.names:
+            history[name] = getattr(self, '_' + name)[:self._size]
+        return history
+
+    @property
+    def min_delta(self):
+        """Returns the minimum absolute change which is considered an improvement."""
+        return self._core.min_delta
+
+    @min_delta.setter
+    def min_delta(self, min_delta):
+        self._core.min_delta = min_delta
+
+    @property
+    def patience(self):
+        """Returns the maximum number of steps which can yield no improvement."""
+        return self._core.patience
+
+    @patience.setter
+    def patience(self, patience):
+        self._core.patience = patience
+
+    @property
+    def threshold(self):
+        """Returns the threshold (disabled if not greater zero)."""
+        return self._core.threshold
+
+    @threshold.setter
+    def threshold(self, threshold):
+        self._core.threshold = threshold
 
-        if '_acc' in monitor and (threshold < 0.0 or threshold > 1.0):
-            raise ValueError('Invalid value encountered: '
-                             '"threshold" needs to be within the interval [0, 1] '
-                             'for accuracy metrics.')
+    def _validate_arguments(self, monitor, min_delta, patience, threshold):
+        _validate_arguments(monitor, min_delta, patience, threshold)
 
     def check_early_stop(self, epoch, measured_values):
         """Checks if the training should be stopped early. The decision is made based on
@@ -110,65 +356,158 @@ class EarlyStopping(EarlyStoppingHandler):
         ----------
         epoch : int
             The number of the current epoch (1-indexed). Multiple checks per epoch are allowed.
-        measured_values : dict of str to float
-            A dictionary of measured values.
+        measured_values : MeasuredValues or dict of str to float
+            The measured values.
         """
         if epoch <= 0:
             raise ValueError('Argument "epoch" must be greater than zero.')
 
-        self.history = self.add_to_history(epoch, measured_values)
+        if not isinstance(measured_values, MeasuredValues):
+            measured_values = MeasuredValues.from_dict(measured_values)
 
-        greater_is_better = '_acc' in self.monitor
-        monitor_sign = 1 if greater_is_better else -1
-
-        measured_value = measured_values.get(self.monitor, None)
-        has_crossed_threshold = measured_value is not None and \
-            np.sign(measured_value - self.threshold) == monitor_sign
-        if self.threshold > 0 and has_crossed_threshold:
-            logging.debug(f'Early stopping: Threshold exceeded. '
-                          f'[value={measured_values[self.monitor]}, threshold={self.threshold}]')
-            return True
-        elif measured_value is None:
+        measured_value = self._monitor_getter(measured_values)
+        # NaN is treated as not measured (`NaN != NaN`)
+        if measured_value is None or measured_value != measured_value:
+            self._epoch_counts[epoch] += 1
             return False
 
-        if len(self.history) == 1:
-            self.index_best = 0
-            return False
+        self._add_to_history(epoch, measured_values)
+
+        core = self._core
+        wait = core.wait
+        stop = core.check(measured_value)
+        if core.improved:
+            self.index_best = self._size - 1
+        elif stop and logger.isEnabledFor(logging.DEBUG):
+            # the counter is left unchanged if the threshold has been crossed
+            if core.wait > wait:
+                logger.debug('Early stopping: Patience exceeded. [value=%s, patience=%s]',
+                             core.wait, core.patience)
+            else:
+                logger.debug('Early stopping: Threshold exceeded. [value=%s, threshold=%s]',
+                             measured_value, core.threshold)
+
+        return stop
+
+    def _add_to_history(self, epoch, measured_values):
+        count = self._epoch_counts[epoch]
+        self._epoch_counts[epoch] = count + 1
+
+        if self._size == self._capacity:
+            self._grow()
+
+        index = self._size
+        self._epoch[index] = epoch
+        self._count[index] = count
+        self._train_acc[index] = measured_values.train_acc
+        self._train_loss[index] = measured_values.train_loss
+        self._val_acc[index] = measured_values.val_acc
+        self._val_loss[index] = measured_values.val_loss
+        self._size += 1
+
+    def _grow(self):
+        self._capacity = max(2 * self._capacity, 16)
+        for name in self._dtype_obj.names:
+            column = getattr(self, '_' + name)
+            grown_column = np.empty((self._capacity,), dtype=column.dtype)
+            grown_column[:self._size] = column[:self._size]
+            setattr(self, '_' + name, grown_column)
+
+
+class EMAPlateauEarlyStopping(EarlyStoppingHandler):
+    """An early stopping handler which stops as soon as the monitored metric has reached a
+    plateau. For this, exponential moving averages of the mean and the variance of the
+    measured values are maintained, and a plateau is detected as soon as the moving variance
+    falls below `delta`. The moving variance is bias-corrected for its zero initialization,
+    and no decision is made before `min_steps` values have been measured.
+
+    In contrast to `EarlyStopping`, no history is kept, i.e. both time and memory per call
+    are constant.
 
-        return self._check_for_improvement(measured_values, monitor_sign)
+    .. versionadded:: 1.1.0
+    """
+    def __init__(self, monitor, alpha=0.2, delta=1e-4, min_steps=5):
+        """
+        Parameters
+        ----------
+        monitor : {'val_loss', 'val_acc', 'train_loss', 'train_acc'}
+            The measured value which will be monitored for early stopping.
+        alpha : float, default=0.2
+            The smoothing factor of the moving averages. Must be within the interval (0, 1].
+            Higher values give more weight to recent measurements.
+        delta : float, default=1e-4
+            Early stopping is triggered as soon as the moving variance falls below this value.
+            Note that the variance is on the squared scale of the monitored metric.
+        min_steps : int, default=5
+            The minimum number of measured values before early stopping can be triggered.
+        """
+        _validate_monitor(monitor)
 
-    def _check_for_improvement(self, measured_values, monitor_sign):
-        previous_best = self.history[self.monitor][self.index_best]
-        index_last = self.history.shape[0] - 1
+        if alpha <= 0 or alpha > 1:
+            raise ValueError('Invalid value encountered: '
+                             '"alpha" needs to be within the interval (0, 1].')
 
-        delta = measured_values[self.monitor] - previous_best
-        delta_sign = np.sign(delta)
+        if delta < 0:
+            raise ValueError('Invalid value encountered: '
+                             '"delta" needs to be greater or equal zero.')
 
-        if self.min_delta > 0:
-            improvement = delta_sign == monitor_sign and np.abs(delta) >= self.min_delta
-        else:
-            improvement = delta_sign == monitor_sign
+        if min_steps < 1:
+            raise ValueError('Invalid value encountered: '
+                             '"min_steps" needs to be greater or equal one.')
+
+        self.monitor = monitor
+        self.alpha = alpha
+        self.delta = delta
+        self.min_steps = min_steps
+
+        self._mean = None
+        self._variance = None
+        self._num_values = 0
+
+    def check_early_stop(self, epoch, measured_values):
+        """Checks if the training should be stopped early. The decision is made based on
+        the measured values of one or more quantitative metrics over time.
+
+        Returns `True` if at least `min_steps` values have been measured and the bias-corrected
+        moving variance of the monitored metric is below `delta`, otherwise `False`.
+        The first measured value only initializes the moving averages.
+        Values which are `None` or NaN are treated as not measured.
+
+        Parameters
+        ----------
+        epoch : int
+            The number of the current epoch (1-indexed). Multiple checks per epoch are allowed.
+        measured_values : MeasuredValues or dict of str to float
+            The measured values.
+        """
+        if epoch <= 0:
+            raise ValueError('Argument "epoch" must be greater than zero.')
 
-        if improvement:
-            self.index_best = index_last
+        measured_value = measured_values.get(self.monitor)
+        if measured_value is None or measured_value != measured_value:
             return False
-        else:
-            history_since_previous_best = self.history[self.index_best+1:][self.monitor]
-            rows_not_nan = np.logical_not(np.isnan(history_since_previous_best))
-            if rows_not_nan.sum() > self.patience:
-                logging.debug(f'Early stopping: Patience exceeded.'
-                              f'{{value={index_last-self.index_best}, patience={self.patience}}}')
-                return True
+
+        self._num_values += 1
+        if self._num_values == 1:
+            self._mean = measured_value
+            self._variance = 0.0
             return False
 
-    def add_to_history(self, epoch, measured_values):
-        count = (self.history['epoch'] == epoch).sum()
-        tuple_measured_values = (measured_values.get('train_acc', None),
-                                 measured_values.get('train_loss', None),
-                                 measured_values.get('val_acc', None),
-                                 measured_values.get('val_loss', None))
-        return np.append(self.history,
-                         np.array((epoch, count) + tuple_measured_values, dtype=self.dtype))
+        diff = measured_value - self._mean
+        self._mean = (1 - self.alpha) * self._mean + self.alpha * measured_value
+        self._variance = (1 - self.alpha) * self._variance + self.alpha * diff * diff
+
+        if self._num_values < self.min_steps:
+            return False
+
+        # the variance starts at zero, i.e. it is biased towards zero after few updates
+        variance = self._variance / (1 - (1 - self.alpha) ** (self._num_values - 1))
+        if variance < self.delta:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Early stopping: Plateau detected. [variance=%s, delta=%s]',
+                             variance, self.delta)
+            return True
+        return False
 
 
 class SequentialEarlyStopping(EarlyStoppingHandler):
@@ -195,10 +534,138 @@ class SequentialEarlyStopping(EarlyStoppingHandler):
         ----------
         epoch : int
             The number of the current epoch (1-indexed). Multiple checks per epoch are allowed.
-        measured_values : dict of str to float
-            A dictionary of measured values.
+        measured_values : MeasuredValues or dict of str to float
+            The measured values.
+        """
+        # all handlers are queried (no short-circuiting) so that each one keeps its history
+        results = [early_stopping_handler.check_early_stop(epoch, measured_values)
+                   for early_stopping_handler in self.early_stopping_handlers]
+        return any(results)
+
+
+class BatchedEarlyStopping(object):
+    """An early stopping implementation which tracks many independent runs (e.g., the trials of
+    a hyperparameter search or the folds of a cross-validation) at once. For each run, the
+    decision equals the one of an `EarlyStopping` instance with the same parameters, but all
+    runs are processed by a few vectorized operations per call.
+
+    As for `EarlyStopping`, `index_best` only counts the calls in which a value has been
+    measured for the respective run, i.e. the best value of run `i` is
+    `history[i][~np.isnan(history[i])][index_best[i]]`.
+
+    .. versionadded:: 1.1.0
+    """
+    def __init__(self, n_runs, monitor, min_delta=1e-14, patience=5, threshold=0.0):
         """
-        results = []
-        for early_stopping_handler in self.early_stopping_handlers:
-            results.append(early_stopping_handler.check_early_stop(epoch, measured_values))
-        return np.any(results)
+        Parameters
+        ----------
+        n_runs : int
+            The number of runs to track.
+        monitor : {'val_loss', 'val_acc', 'train_loss', 'train_acc'}
+            The measured value which will be monitored for early stopping.
+        min_delta : float, default=1e-14
+            The minimum absolute value to consider a change in the measured value as an
+            improvement.
+        patience : int, default=5
+            The maximum number of steps (i.e. calls to `check_early_stop_batch()`) which can yield
+            no improvement.
+        threshold : float, default=0.0
+            If greater zero, then early stopping is triggered as soon as the current measured value
+            crosses ('val_acc', 'train_acc') or falls below ('val_loss', 'train_loss')
+            the given threshold.
+        """
+        if n_runs <= 0:
+            raise ValueError('Invalid value encountered: '
+                             '"n_runs" needs to be greater or equal 1.')
+        _validate_arguments(monitor, min_delta, patience, threshold)
+
+        self.n_runs = n_runs
+        self.monitor = monitor
+        self.min_delta = min_delta
+        self.patience = patience
+        self.threshold = threshold
+
+        self._greater_is_better = monitor in _ACC_MONITORS
+
+        self.index_best = np.full((n_runs,), -1, dtype=int)
+        self.best_values = np.full((n_runs,), -np.inf if self._greater_is_better else np.inf)
+        self.wait = np.zeros((n_runs,), dtype=int)
+        self._num_measured = np.zeros((n_runs,), dtype=int)
+
+        self._capacity = 16
+        self._size = 0
+        self._values = np.empty((n_runs, self._capacity), dtype=float)
+
+    @property
+    def history(self):
+        """The measured values of the monitored metric which have been recorded so far.
+
+        Returns
+        -------
+        history : np.ndarray[float]
+            An array of shape (n_runs, number of calls to `check_early_stop_batch()`), in which
+            missing values are NaN.
+        """
+        return self._values[:, :self._size]
+
+    def check_early_stop_batch(self, epoch, values):
+        """Checks for each run if the training should be stopped early.
+
+        Parameters
+        ----------
+        epoch : int
+            The number of the current epoch (1-indexed). Multiple checks per epoch are allowed.
+        values : np.ndarray[float]
+            The current value of the monitored metric for each run, i.e. an array of shape
+            (n_runs,). Runs for which no value has been measured are indicated by NaN.
+
+        Returns
+        -------
+        stop : np.ndarray[bool]
+            A boolean mask of shape (n_runs,) which is `True` for each run that should be
+            stopped.
+        """
+        if epoch <= 0:
+            raise ValueError('Argument "epoch" must be greater than zero.')
+
+        values = np.asarray(values, dtype=float)
+        if values.shape != (self.n_runs,):
+            raise ValueError(f'Argument "values" must be of shape ({self.n_runs},) '
+                             f'but has shape {values.shape}.')
+
+        self._add_to_history(values)
+
+        measured = ~np.isnan(values)
+        self._num_measured += measured
+        if self._greater_is_better:
+            crossed = values > self.threshold
+            delta = values - self.best_values
+        else:
+            crossed = values < self.threshold
+            delta = self.best_values - values
+
+        if self.threshold > 0:
+            measured &= ~crossed
+        else:
+            crossed = np.zeros_like(measured)
+
+        improved = delta >= self.min_delta if self.min_delta > 0 else delta > 0
+        improved &= measured
+        not_improved = measured & ~improved
+
+        self.index_best[improved] = self._num_measured[improved] - 1
+        self.best_values[improved] = values[improved]
+        self.wait[improved] = 0
+        self.wait[not_improved] += 1
+
+        return crossed | (not_improved & (self.wait > self.patience))
+
+    def _add_to_history(self, values):
+        if self._size == self._capacity:
+            self._capacity *= 2
+            grown_values = np.empty((self.n_runs, self._capacity), dtype=float)
+            grown_values[:, :self._size] = self._values[:, :self._size]
+            self._values = grown_values
+
+        self._values[:, self._size] = values
+        self._size += 1
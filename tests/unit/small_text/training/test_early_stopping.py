@@ -1,12 +1,62 @@
+import pickle
 import unittest
+import numpy as np
+
+from types import MappingProxyType
 
 from small_text.training.early_stopping import (
+    BatchedEarlyStopping,
     EarlyStopping,
+    EMAPlateauEarlyStopping,
+    MeasuredValues,
     NoopEarlyStopping,
     SequentialEarlyStopping
 )
 
 
+class MeasuredValuesTest(unittest.TestCase):
+
+    def test_init_default(self):
+        measured_values = MeasuredValues()
+        self.assertIsNone(measured_values.train_acc)
+        self.assertIsNone(measured_values.train_loss)
+        self.assertIsNone(measured_values.val_acc)
+        self.assertIsNone(measured_values.val_loss)
+
+    def test_from_dict(self):
+        measured_values = MeasuredValues.from_dict({'val_loss': 0.35, 'valid_loss': 0.25})
+        self.assertIsNone(measured_values.train_acc)
+        self.assertIsNone(measured_values.train_loss)
+        self.assertIsNone(measured_values.val_acc)
+        self.assertEqual(0.35, measured_values.val_loss)
+
+    def test_dict_like_access(self):
+        measured_values = MeasuredValues(train_acc=0.80, val_loss=0.35)
+        self.assertEqual(0.80, measured_values['train_acc'])
+        self.assertEqual(0.35, measured_values.get('val_loss'))
+        self.assertIsNone(measured_values.get('val_acc'))
+        self.assertEqual(0.5, measured_values.get('unknown_metric', 0.5))
+        with self.assertRaises(KeyError):
+            measured_values['unknown_metric']
+
+    def test_unmeasured_values_are_missing(self):
+        measured_values = MeasuredValues(val_acc=0.80, val_loss=0.35)
+        self.assertEqual(0.0, measured_values.get('train_acc', 0.0))
+        self.assertEqual(0.80, measured_values.get('val_acc', 0.0))
+        with self.assertRaises(KeyError):
+            measured_values['train_acc']
+
+    def test_mapping_protocol(self):
+        measured_values = MeasuredValues(train_acc=0.80, val_loss=0.35)
+        self.assertTrue('val_loss' in measured_values)
+        self.assertFalse('val_acc' in measured_values)
+        self.assertFalse('unknown_metric' in measured_values)
+        self.assertEqual(2, len(measured_values))
+        self.assertEqual(['train_acc', 'val_loss'], list(measured_values.keys()))
+        self.assertEqual({'train_acc': 0.80, 'val_loss': 0.35}, dict(measured_values))
+        self.assertEqual(dict(measured_values), {**measured_values})
+
+
 class NoopStoppingHandlerTest(unittest.TestCase):
 
     def test_stopping_handler_all(self):
@@ -28,9 +78,126 @@ class EarlyStoppingTest(unittest.TestCase):
         self.assertFalse(check_early_stop(2, {'valid_loss': 0.34}))
         self.assertFalse(check_early_stop(2, {'valid_loss': 0.35}))
 
+    def test_check_early_stop_logging(self):
+        stopping_handler = EarlyStopping('val_loss', patience=1, threshold=0.1)
+        check_early_stop = stopping_handler.check_early_stop
+        with self.assertLogs('small_text.training.early_stopping', level='DEBUG') as cm:
+            self.assertFalse(check_early_stop(1, {'val_loss': 0.35}))
+            self.assertFalse(check_early_stop(2, {'val_loss': 0.36}))
+            self.assertTrue(check_early_stop(3, {'val_loss': 0.37}))
+            self.assertTrue(check_early_stop(4, {'val_loss': 0.05}))
+        self.assertEqual(2, len(cm.output))
+        self.assertIn('Patience exceeded. [value=2, patience=1]', cm.output[0])
+        self.assertIn('Threshold exceeded. [value=0.05, threshold=0.1]', cm.output[1])
+
+    def test_check_early_stop_with_changed_patience(self):
+        stopping_handler = EarlyStopping('val_loss', patience=1)
+        stopping_handler.patience = 2
+        self.assertEqual(2, stopping_handler.patience)
+
+        check_early_stop = stopping_handler.check_early_stop
+        self.assertFalse(check_early_stop(1, {'val_loss': 0.35}))
+        self.assertFalse(check_early_stop(2, {'val_loss': 0.36}))
+        self.assertFalse(check_early_stop(3, {'val_loss': 0.37}))
+        self.assertTrue(check_early_stop(4, {'val_loss': 0.38}))
+
+    def test_check_early_stop_with_measured_values(self):
+        stopping_handler = EarlyStopping('val_loss', patience=1)
+        check_early_stop = stopping_handler.check_early_stop
+        self.assertFalse(check_early_stop(1, MeasuredValues(train_acc=0.80, val_loss=0.35)))
+        self.assertFalse(check_early_stop(2, MeasuredValues(train_acc=0.81, val_loss=0.36)))
+        self.assertTrue(check_early_stop(3, MeasuredValues(train_acc=0.82, val_loss=0.37)))
+        self.assertEqual([0.80, 0.81, 0.82], stopping_handler.history['train_acc'].tolist())
+
+    def test_check_early_stop_with_nan_values(self):
+        stopping_handler = EarlyStopping('val_loss', patience=2)
+        check_early_stop = stopping_handler.check_early_stop
+        self.assertFalse(check_early_stop(1, {'val_loss': 0.3}))
+        for epoch in range(2, 6):
+            self.assertFalse(check_early_stop(epoch, {'val_loss': float('nan')}))
+        self.assertEqual((1,), stopping_handler.history.shape)
+        self.assertEqual(0, stopping_handler.index_best)
+
+    def test_check_early_stop_with_other_mapping(self):
+        stopping_handler = EarlyStopping('val_loss', patience=1)
+        check_early_stop = stopping_handler.check_early_stop
+        self.assertFalse(check_early_stop(1, MappingProxyType({'val_loss': 0.35})))
+        self.assertFalse(check_early_stop(2, MappingProxyType({'val_loss': 0.36})))
+        self.assertTrue(check_early_stop(3, MappingProxyType({'val_loss': 0.37})))
+
+    def test_check_early_stop_with_leading_none_values(self):
+        stopping_handler = EarlyStopping('val_loss', patience=1)
+        check_early_stop = stopping_handler.check_early_stop
+        self.assertFalse(check_early_stop(1, {'val_loss': None}))
+        self.assertFalse(check_early_stop(1, {'val_loss': None}))
+        self.assertFalse(check_early_stop(2, {'val_loss': 0.50}))
+        self.assertEqual(0, stopping_handler.index_best)
+        self.assertFalse(check_early_stop(3, {'val_loss': 0.60}))
+        self.assertTrue(check_early_stop(4, {'val_loss': 0.70}))
+
+    def test_check_early_stop_history_skips_unmeasured_values(self):
+        stopping_handler = EarlyStopping('val_loss', patience=5)
+        self.assertEqual(0, stopping_handler._capacity)
+
+        stopping_handler.check_early_stop(1, {'train_loss': 0.40, 'val_loss': None})
+        stopping_handler.check_early_stop(1, {'train_loss': 0.38, 'val_loss': 0.35})
+        stopping_handler.check_early_stop(2, {'train_loss': 0.37})
+        stopping_handler.check_early_stop(2, {'train_loss': 0.36, 'val_loss': 0.34})
+
+        history = stopping_handler.history
+        self.assertEqual([1, 2], history['epoch'].tolist())
+        self.assertEqual([1, 1], history['count'].tolist())
+        self.assertEqual([0.38, 0.36], history['train_loss'].tolist())
+        self.assertEqual([0.35, 0.34], history['val_loss'].tolist())
+        self.assertEqual(1, stopping_handler.index_best)
+
+    def test_check_early_stop_history_counts(self):
+        stopping_handler = EarlyStopping('val_loss', patience=5)
+        for epoch in [1, 1, 1, 2, 2, 3]:
+            stopping_handler.check_early_stop(epoch, {'val_loss': 0.35})
+
+        self.assertEqual([0, 1, 2, 0, 1, 0], stopping_handler.history['count'].tolist())
+
+    def test_check_early_stop_history_exceeds_initial_capacity(self):
+        stopping_handler = EarlyStopping('val_loss', patience=100)
+        for epoch in range(1, 41):
+            self.assertFalse(stopping_handler.check_early_stop(epoch, {'val_loss': 1.0 / epoch}))
+
+        self.assertEqual((40,), stopping_handler.history.shape)
+        self.assertEqual(list(range(1, 41)), stopping_handler.history['epoch'].tolist())
+        self.assertEqual(1.0 / 40, stopping_handler.history['val_loss'][-1])
+        self.assertEqual(39, stopping_handler.index_best)
+
 
 class GeneralEarlyStoppingTest(object):
 
+    def test_init_unhashable_monitor(self):
+        with self.assertRaisesRegex(ValueError, 'Unsupported metric'):
+            EarlyStopping(['val_loss'])
+
+    def test_init_subclass(self):
+        class CustomEarlyStopping(EarlyStopping):
+            def __init__(self, monitor, **kwargs):
+                super().__init__(monitor, **kwargs)
+                self.monitor = monitor
+
+        stopping_handler = CustomEarlyStopping(self.get_monitor(), patience=1)
+        self.assertIs(CustomEarlyStopping, type(stopping_handler))
+        self.assertEqual(self.get_monitor(), stopping_handler.monitor)
+        self.assertFalse(stopping_handler.check_early_stop(1, {self.get_monitor(): 0.5}))
+        self.assertFalse(stopping_handler.check_early_stop(2, {self.get_monitor(): 0.5}))
+        self.assertTrue(stopping_handler.check_early_stop(3, {self.get_monitor(): 0.5}))
+
+    def test_pickle(self):
+        stopping_handler = EarlyStopping(self.get_monitor(), patience=1)
+        self.assertFalse(stopping_handler.check_early_stop(1, {self.get_monitor(): 0.5}))
+
+        stopping_handler = pickle.loads(pickle.dumps(stopping_handler))
+        self.assertIs(EarlyStopping, type(stopping_handler))
+        self.assertEqual(1, stopping_handler.patience)
+        self.assertFalse(stopping_handler.check_early_stop(2, {self.get_monitor(): 0.5}))
+        self.assertTrue(stopping_handler.check_early_stop(3, {self.get_monitor(): 0.5}))
+
     def test_init_invalid_monitor(self):
         with self.assertRaisesRegex(ValueError, 'Unsupported metric'):
             EarlyStopping('unknown_metric')
@@ -271,6 +438,82 @@ class EarlyStoppingTrainAccTest(unittest.TestCase,
         return 'train_acc'
 
 
+class EMAPlateauEarlyStoppingTest(unittest.TestCase):
+
+    def test_init_default(self):
+        stopping_handler = EMAPlateauEarlyStopping('val_loss')
+        self.assertEqual('val_loss', stopping_handler.monitor)
+        self.assertEqual(0.2, stopping_handler.alpha)
+        self.assertEqual(1e-4, stopping_handler.delta)
+        self.assertEqual(5, stopping_handler.min_steps)
+
+    def test_init_invalid_monitor(self):
+        with self.assertRaisesRegex(ValueError, 'Unsupported metric'):
+            EMAPlateauEarlyStopping('unknown_metric')
+
+    def test_init_unhashable_monitor(self):
+        with self.assertRaisesRegex(ValueError, 'Unsupported metric'):
+            EMAPlateauEarlyStopping(['val_loss'])
+
+    def test_init_invalid_alpha(self):
+        for alpha in [0, -0.1, 1.1]:
+            with self.assertRaisesRegex(ValueError,
+                                        'Invalid value encountered: "alpha" needs to be'):
+                EMAPlateauEarlyStopping('val_loss', alpha=alpha)
+
+    def test_init_invalid_delta(self):
+        with self.assertRaisesRegex(ValueError,
+                                    'Invalid value encountered: "delta" needs to be'):
+            EMAPlateauEarlyStopping('val_loss', delta=-0.01)
+
+    def test_init_invalid_min_steps(self):
+        with self.assertRaisesRegex(ValueError,
+                                    'Invalid value encountered: "min_steps" needs to be'):
+            EMAPlateauEarlyStopping('val_loss', min_steps=0)
+
+    def test_check_early_stop_invalid_epoch(self):
+        stopping_handler = EMAPlateauEarlyStopping('val_loss')
+        with self.assertRaisesRegex(ValueError,
+                                    'Argument "epoch" must be greater'):
+            stopping_handler.check_early_stop(0, {'val_loss': 0.25})
+
+    def test_check_early_stop(self):
+        stopping_handler = EMAPlateauEarlyStopping('val_loss', alpha=0.5, delta=1e-3)
+        check_early_stop = stopping_handler.check_early_stop
+        self.assertFalse(check_early_stop(1, {'val_loss': 0.50}))
+        self.assertFalse(check_early_stop(2, {'val_loss': 0.40}))
+        self.assertFalse(check_early_stop(3, {'val_loss': None}))
+        self.assertFalse(check_early_stop(3, {'val_loss': float('nan')}))
+        self.assertFalse(check_early_stop(3, {'val_loss': 0.37}))
+        self.assertFalse(check_early_stop(4, {'val_loss': 0.36}))
+        self.assertFalse(check_early_stop(5, {'val_loss': 0.36}))
+        self.assertFalse(check_early_stop(6, {'val_loss': 0.36}))
+        self.assertTrue(check_early_stop(7, {'val_loss': 0.36}))
+
+    def test_check_early_stop_with_measured_values(self):
+        stopping_handler = EMAPlateauEarlyStopping('train_acc', delta=1e-3)
+        for epoch in range(1, 5):
+            self.assertFalse(stopping_handler.check_early_stop(epoch,
+                                                               MeasuredValues(train_acc=0.70)))
+        self.assertTrue(stopping_handler.check_early_stop(5, MeasuredValues(train_acc=0.70)))
+
+    def test_check_early_stop_with_min_steps(self):
+        stopping_handler = EMAPlateauEarlyStopping('val_loss', min_steps=2)
+        self.assertFalse(stopping_handler.check_early_stop(1, {'val_loss': 0.25}))
+        self.assertTrue(stopping_handler.check_early_stop(2, {'val_loss': 0.25}))
+
+    def test_check_early_stop_improving_does_not_stop(self):
+        stopping_handler = EMAPlateauEarlyStopping('val_loss')
+        for epoch in range(1, 21):
+            val_loss = 0.60 - 0.02 * epoch
+            self.assertFalse(stopping_handler.check_early_stop(epoch, {'val_loss': val_loss}))
+
+        stopping_handler = EMAPlateauEarlyStopping('val_acc')
+        for epoch in range(1, 21):
+            val_acc = 0.80 + 0.005 * epoch
+            self.assertFalse(stopping_handler.check_early_stop(epoch, {'val_acc': val_acc}))
+
+
 class SequentialEarlyStoppingTest(unittest.TestCase):
 
     def test_check_early_stop(self):
@@ -296,3 +539,79 @@ class SequentialEarlyStoppingTest(unittest.TestCase):
         self.assertFalse(check_early_stop(2, {'val_loss': 0.08, 'train_acc': 0.69}))
         self.assertFalse(check_early_stop(3, {'val_loss': 0.07, 'train_acc': 0.70}))
         self.assertFalse(check_early_stop(4, {'val_loss': 0.07, 'train_acc': 0.70}))
+
+    def test_check_early_stop_queries_all_handlers(self):
+        early_stopping_handlers = [
+            EarlyStopping('val_loss', threshold=0.1),
+            EarlyStopping('train_acc', patience=5)
+        ]
+        stopping_handler = SequentialEarlyStopping(early_stopping_handlers)
+
+        self.assertTrue(stopping_handler.check_early_stop(1, {'val_loss': 0.05,
+                                                              'train_acc': 0.68}))
+        self.assertEqual((1,), early_stopping_handlers[0].history.shape)
+        self.assertEqual((1,), early_stopping_handlers[1].history.shape)
+
+
+class BatchedEarlyStoppingTest(unittest.TestCase):
+
+    def test_init_default(self):
+        stopping_handler = BatchedEarlyStopping(3, 'val_loss')
+        self.assertEqual(3, stopping_handler.n_runs)
+        self.assertEqual('val_loss', stopping_handler.monitor)
+        self.assertEqual(1e-14, stopping_handler.min_delta)
+        self.assertEqual(5, stopping_handler.patience)
+        self.assertEqual(0, stopping_handler.threshold)
+        self.assertEqual((3, 0), stopping_handler.history.shape)
+
+    def test_init_invalid_n_runs(self):
+        with self.assertRaisesRegex(ValueError,
+                                    'Invalid value encountered: "n_runs" needs to be'):
+            BatchedEarlyStopping(0, 'val_loss')
+
+    def test_init_invalid_monitor(self):
+        with self.assertRaisesRegex(ValueError, 'Unsupported metric'):
+            BatchedEarlyStopping(3, 'unknown_metric')
+
+    def test_check_early_stop_batch_invalid_shape(self):
+        stopping_handler = BatchedEarlyStopping(3, 'val_loss')
+        with self.assertRaisesRegex(ValueError, 'Argument "values" must be of shape'):
+            stopping_handler.check_early_stop_batch(1, np.array([0.35, 0.35]))
+
+    def test_check_early_stop_batch(self):
+        stopping_handler = BatchedEarlyStopping(3, 'val_loss', patience=1)
+        check_early_stop_batch = stopping_handler.check_early_stop_batch
+
+        self.assertEqual([False, False, False],
+                         check_early_stop_batch(1, [0.35, 0.35, np.nan]).tolist())
+        self.assertEqual([False, False, False],
+                         check_early_stop_batch(2, [0.36, 0.34, 0.35]).tolist())
+        self.assertEqual([True, False, False],
+                         check_early_stop_batch(3, [0.37, 0.33, 0.36]).tolist())
+        self.assertEqual([0, 2, 0], stopping_handler.index_best.tolist())
+
+    def test_check_early_stop_batch_equals_early_stopping(self):
+        rng = np.random.RandomState(42)
+        for monitor, threshold in [('val_loss', 0.0), ('val_acc', 0.0),
+                                   ('train_loss', 0.05), ('train_acc', 0.95)]:
+            n_runs, n_checks = 20, 40
+            values = rng.uniform(0, 1, size=(n_runs, n_checks))
+            values[rng.uniform(0, 1, size=(n_runs, n_checks)) < 0.2] = np.nan
+
+            batched = BatchedEarlyStopping(n_runs, monitor, patience=3, threshold=threshold)
+            handlers = [EarlyStopping(monitor, patience=3, threshold=threshold)
+                        for _ in range(n_runs)]
+
+            for i in range(n_checks):
+                epoch = i // 2 + 1
+                stop = batched.check_early_stop_batch(epoch, values[:, i])
+                expected = [handler.check_early_stop(epoch, {monitor: value})
+                            for handler, value in zip(handlers, values[:, i])]
+                self.assertEqual(expected, stop.tolist())
+
+            self.assertEqual([handler.index_best for handler in handlers],
+                             batched.index_best.tolist())
+            self.assertEqual([handler.history[monitor][handler.index_best]
+                              for handler in handlers],
+                             batched.best_values.tolist())
+            np.testing.assert_array_equal(values, batched.history)